@@ -4,18 +4,21 @@ FastAPI app for Daily Dewey - returns a different DDC section each day
 """
 
 from fastapi import FastAPI, Query, Response, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime, timezone, timedelta, date
+from functools import lru_cache
 import hashlib
 import os
+from pathlib import Path
 import sys
 from typing import Any
-import re
+import string
 import logging
-import json
 import time
 
+import orjson
+
 from ddc_helpers import DDCDatabase
 
 # Configure logging
@@ -29,10 +32,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Translation table mapping every ASCII letter to an underscore
+_MASK_TABLE = str.maketrans(dict.fromkeys(string.ascii_letters, "_"))
+
 app = FastAPI(
     title="Daily Dewey API",
     description="Get a different Dewey Decimal Classification section each day",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware to allow requests from TRMNL platform
@@ -48,44 +55,32 @@ app.add_middleware(
 async def log_requests(request: Request, call_next):
     """Log all HTTP requests and responses"""
     start_time = time.time()
-    
-    # Log incoming request
-    logger.info(f"🔵 INCOMING REQUEST:")
-    logger.info(f"   Method: {request.method}")
-    logger.info(f"   URL: {request.url}")
-    logger.info(f"   Headers: {dict(request.headers)}")
-    logger.info(f"   Query params: {dict(request.query_params)}")
-    logger.info(f"   Client: {request.client.host if request.client else 'unknown'}")
-    
+
     # Process request
     response = await call_next(request)
-    
+
     # Calculate processing time
     process_time = time.time() - start_time
-    
-    # Log response
-    logger.info(f"🟢 OUTGOING RESPONSE:")
-    logger.info(f"   Status: {response.status_code}")
-    logger.info(f"   Headers: {dict(response.headers)}")
-    logger.info(f"   Processing time: {process_time:.4f}s")
-    
+
+    logger.info(
+        "%s %s %d %.4fs",
+        request.method,
+        request.url.path,
+        response.status_code,
+        process_time,
+    )
+
     # Add processing time to response headers
     response.headers["X-Process-Time"] = str(process_time)
-    
+
     return response
 
 # Initialize database - check multiple possible locations
 db_path = None
-possible_paths = [
-    os.path.join(os.path.dirname(__file__), "data", "ddc.db"),
-    os.path.join(os.path.dirname(__file__), "ddc_database.db"),
-    "data/ddc.db",
-    "ddc_database.db"
-]
-
-for path in possible_paths:
-    if os.path.exists(path):
-        db_path = path
+base_dir = Path(__file__).parent
+for candidate in (base_dir / "data" / "ddc.db", base_dir / "ddc_database.db"):
+    if candidate.is_file():
+        db_path = str(candidate)
         break
 
 if not db_path:
@@ -101,19 +96,25 @@ async def startup_event():
     logger.info(f"📁 Database path: {db_path}")
     logger.info(f"✅ Database exists: {os.path.exists(db_path)}")
     try:
+        db_ok = ddc_db.ping()
+        logger.info(f"🔍 Database test: {'OK' if db_ok else 'No data found'}")
         test_section = ddc_db.get_section("0")
-        logger.info(f"🔍 Database test: {'OK' if test_section else 'No data found'}")
         if test_section:
             logger.info(f"📖 Test section data: {test_section}")
     except Exception as e:
         logger.error(f"❌ Database test error: {e}")
+    try:
+        # Warm the daily cache so the first request doesn't pay for the lookup
+        get_daily_responses(datetime.now(timezone.utc).date())
+    except Exception as e:
+        logger.error(f"❌ Daily section warmup error: {e}")
     logger.info("✨ Daily Dewey API ready!")
 
 
-def get_daily_section() -> dict[str, Any]:
-    """Get the DDC section for today based on date"""
-    # Use today's date to generate a deterministic "random" section
-    today: date = datetime.now(timezone.utc).date()
+def get_daily_section(today: date | None = None) -> dict[str, Any]:
+    """Get the DDC section for today (or the given date)"""
+    if today is None:
+        today = datetime.now(timezone.utc).date()
     date_str = today.isoformat()
 
     # Create a hash of the date to get a pseudo-random but deterministic number
@@ -127,30 +128,89 @@ def get_daily_section() -> dict[str, Any]:
     section = ddc_db.get_section(section_code)
 
     if section:
-        # Format the section code as a 3-digit decimal number
-        section["section_code"] = section_code.zfill(3)
         return section
 
     # Fallback: get any random section if something goes wrong
     section = ddc_db.get_random_section(exclude_unassigned=False)
     if section:
-        # Format the section code as a 3-digit decimal number
-        section["section_code"] = str(section["section_code"]).zfill(3)
         return section
     else:
         raise Exception("No Section Found!")
 
 
+# Per-day values are cached with maxsize=1: only today's entry is ever reused
+@lru_cache(maxsize=1)
+def get_cache_expiry(today: date) -> tuple[float, str]:
+    """Get the next UTC midnight timestamp and Expires header after `today`"""
+    midnight = datetime.combine(
+        today + timedelta(days=1), datetime.min.time()
+    ).replace(tzinfo=timezone.utc)
+    return midnight.timestamp(), midnight.strftime("%a, %d %b %Y %H:%M:%S GMT")
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check whether an If-None-Match header value matches the given ETag"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        # If-None-Match uses weak comparison, so ignore any W/ prefix
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
 def mask_letters(text: str) -> str:
     """Replace all letters with underscores, preserving spaces and punctuation"""
-    return re.sub(r"[a-zA-Z]", "_", text)
+    return text.translate(_MASK_TABLE)
+
+
+@lru_cache(maxsize=1)
+def get_daily_responses(today: date) -> tuple[bytes, ...]:
+    """Get the serialized /daily bodies for each hint level on the given date"""
+    return tuple(orjson.dumps(body) for body in build_daily_bodies(today))
+
+
+def build_daily_bodies(today: date) -> list[dict[str, Any]]:
+    """Build the /daily response body for each hint level on the given date"""
+    section_data = get_daily_section(today)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            f"📚 Today's section data: {orjson.dumps(section_data).decode()}"
+        )
+
+    # Build response - always include the three (pre-formatted) numeric codes
+    result: dict[str, Any] = {
+        "date": today.isoformat(),
+        "main_class": section_data["main_class"],
+        "division": section_data["division"],
+        "section": section_data["section"],
+    }
+    bodies = [dict(result)]
+
+    # Add hints progressively based on hint level
+    result["main_class_description"] = section_data["main_class_description"]
+    bodies.append(dict(result))
+
+    result["division_description"] = section_data["division_description"]
+    bodies.append(dict(result))
+
+    result["section_masked"] = mask_letters(section_data["section_description"])
+    bodies.append(dict(result))
+
+    result["section_description"] = section_data["section_description"]
+    bodies.append(dict(result))
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"📤 Daily responses built: {orjson.dumps(result).decode()}")
+    return bodies
 
 
 @app.get("/daily")
 async def get_daily_dewey(
-    response: Response,
+    request: Request,
     hint: int = Query(0, ge=0, le=4, description="Hint level (0-4)"),
-) -> dict[str, Any]:
+) -> Response:
     """
     Get today's Dewey Decimal Classification section.
 
@@ -167,57 +227,31 @@ async def get_daily_dewey(
     - hint=3: + main class, division descriptions, and masked section name
     - hint=4: + complete section description (the answer)
     """
-    
-    logger.info(f"💡 Processing daily request with hint level: {hint}")
-
-    # Get today's section
-    section_data = get_daily_section()
-    logger.info(f"📚 Today's section data: {json.dumps(section_data, indent=2)}")
-
-    # Build response - always include the three numeric codes
-    result: dict[str, Any] = {
-        "date": datetime.now(timezone.utc).date().isoformat(),
-        "main_class": str(section_data["main_class_code"]).zfill(3),
-        "division": str(section_data["division_code"]).zfill(3),
-        "section": section_data["section_code"],
-    }
-    logger.info(f"🏗️  Base response built: {json.dumps(result, indent=2)}")
-
-    # Add hints progressively based on hint level
-    if hint >= 1:
-        result["main_class_description"] = section_data["main_class_description"]
-        logger.info(f"🔍 Added main class description (hint >= 1)")
-
-    if hint >= 2:
-        result["division_description"] = section_data["division_description"]
-        logger.info(f"🔍 Added division description (hint >= 2)")
 
-    if hint >= 3:
-        result["section_masked"] = mask_letters(section_data["section_description"])
-        logger.info(f"🔍 Added masked section (hint >= 3): {result['section_masked']}")
-
-    if hint >= 4:
-        result["section_description"] = section_data["section_description"]
-        logger.info(f"🔍 Added full section description (hint >= 4)")
-    
-    logger.info(f"📤 Final response: {json.dumps(result, indent=2)}")
+    now = datetime.now(timezone.utc)
+    today = now.date()
 
     # Set aggressive caching headers
     # Cache until midnight UTC
-    now = datetime.now(timezone.utc)
-    midnight = datetime.combine(
-        (now + timedelta(days=1)).date(), datetime.min.time()
-    ).replace(tzinfo=timezone.utc)
-    seconds_until_midnight = int((midnight - now).total_seconds())
+    midnight_ts, expires = get_cache_expiry(today)
+    seconds_until_midnight = int(midnight_ts - now.timestamp())
+
+    headers = {
+        "Cache-Control": f"public, max-age={seconds_until_midnight}, immutable",
+        "Expires": expires,
+        "X-Content-Type-Options": "nosniff",
+        "Vary": "hint",
+        # The response for a given date and hint level never changes
+        "ETag": f'"{today.isoformat()}-{hint}"',
+    }
 
-    response.headers["Cache-Control"] = (
-        f"public, max-age={seconds_until_midnight}, immutable"
-    )
-    response.headers["Expires"] = midnight.strftime("%a, %d %b %Y %H:%M:%S GMT")
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["Vary"] = "hint"
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    body = get_daily_responses(today)[hint]
 
-    return result
+    # The bodies are already serialized, so skip FastAPI's response encoding
+    return Response(body, media_type="application/json", headers=headers)
 
 
 @app.get("/health")
@@ -225,8 +259,7 @@ async def health_check():
     """Health check endpoint"""
     try:
         # Test database connection
-        test_section = ddc_db.get_section("0")
-        db_status = "connected" if test_section else "no_data"
+        db_status = "connected" if ddc_db.ping() else "no_data"
     except Exception as e:
         db_status = f"error: {str(e)}"
     
@@ -238,7 +271,23 @@ async def health_check():
     }
 
 
+@app.get("/", include_in_schema=False)
+async def root(request: Request):
+    """Redirect to today's section, keeping any query parameters"""
+    query = request.url.query
+    return RedirectResponse(
+        f"/daily?{query}" if query else "/daily", status_code=308
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        log_level="warning",
+    )
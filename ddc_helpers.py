@@ -1,124 +1,204 @@
 # Helper functions for DDC API usage
 
+import os
+import random
 import sqlite3
+from functools import lru_cache
+from pathlib import Path
 
 
 class DDCDatabase:
     """Helper class for querying DDC database"""
 
+    # Reusing identical SQL text on the shared connection lets sqlite3's
+    # statement cache skip re-parsing and re-planning each query
+    _ALL_SECTIONS_SQL = """
+        SELECT * FROM full_classification
+    """
+    _PING_SQL = """
+        SELECT 1 FROM sections LIMIT 1
+    """
+    _SEARCH_SQL = """
+        SELECT code, title, level, display
+        FROM searchable_ddc
+        WHERE search_text LIKE ?
+        ORDER BY code
+        LIMIT ?
+    """
+    # Same query against the trigram FTS5 index, which can answer
+    # LIKE '%...%' without scanning every row
+    _FTS_SEARCH_SQL = """
+        SELECT code, title, level, display
+        FROM searchable_ddc_fts
+        WHERE search_text LIKE ?
+        ORDER BY code
+        LIMIT ?
+    """
+    _HAS_FTS_SQL = """
+        SELECT 1 FROM sqlite_master
+        WHERE type = 'table' AND name = 'searchable_ddc_fts'
+    """
+    _COUNT_ASSIGNED_SECTIONS_SQL = """
+        SELECT COUNT(*) FROM full_classification
+        WHERE section_description NOT LIKE '%[Unassigned]%'
+    """
+    _COUNT_SECTIONS_SQL = """
+        SELECT COUNT(*) FROM full_classification
+    """
+    _RANDOM_ASSIGNED_SECTION_SQL = """
+        SELECT section_code FROM full_classification
+        WHERE section_description NOT LIKE '%[Unassigned]%'
+        LIMIT 1 OFFSET ?
+    """
+    _RANDOM_SECTION_SQL = """
+        SELECT section_code FROM full_classification
+        LIMIT 1 OFFSET ?
+    """
+    _SECTIONS_BY_DIVISION_SQL = """
+        SELECT code, description
+        FROM sections
+        WHERE division = ?
+        ORDER BY code
+    """
+    _DIVISIONS_BY_MAIN_CLASS_SQL = """
+        SELECT code, description
+        FROM divisions
+        WHERE main_class = ?
+        ORDER BY code
+    """
+
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self._conn: sqlite3.Connection | None = None
+        self._conn_pid: int | None = None
+        conn = self._get_conn()
+
+        # Count once so random picks can jump to an offset instead of sorting
+        self._assigned_section_count = conn.execute(
+            self._COUNT_ASSIGNED_SECTIONS_SQL
+        ).fetchone()[0]
+        self._section_count = conn.execute(self._COUNT_SECTIONS_SQL).fetchone()[0]
+
+        # The whole classification is small (1000 sections), so keep it in
+        # memory and serve section lookups without touching SQLite
+        self._by_code: dict[str, dict[str, str | int]] = {}
+        for row in conn.execute(self._ALL_SECTIONS_SQL):
+            section = dict(row)
+            # Pre-format the 3-digit codes used in API responses
+            section["section"] = str(row["section_code"]).zfill(3)
+            section["division"] = str(row["division_code"]).zfill(3)
+            section["main_class"] = str(row["main_class_code"]).zfill(3)
+            self._by_code[row["section_code"]] = section
+
+        # Databases built before the FTS index existed fall back to the view
+        has_fts = conn.execute(self._HAS_FTS_SQL).fetchone() is not None
+        self._search_sql = self._FTS_SEARCH_SQL if has_fts else self._SEARCH_SQL
+
+        # Search terms repeat a lot, so remember recent results per instance
+        self._search_cached = lru_cache(maxsize=1024)(self._search_impl)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a read-only connection to the database"""
+        conn = sqlite3.connect(
+            f"{Path(self.db_path).resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA cache_size = -65536")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Get this process's connection, opening a new one after a fork"""
+        # The database is read-only, so one shared connection per process is
+        # enough; SQLite handles must not be carried across fork() into workers
+        pid = os.getpid()
+        if self._conn is None or self._conn_pid != pid:
+            self._conn = self._connect()
+            self._conn_pid = pid
+        return self._conn
+
+    def ping(self) -> bool:
+        """Check that the database can be queried and has data"""
+        return self._get_conn().execute(self._PING_SQL).fetchone() is not None
 
     def get_section(self, code: str) -> dict[str, str | int] | None:
         """Get section details by code"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT * FROM full_classification 
-                WHERE section_code = ?
-            """,
-                (code,),
-            )
-            row = cursor.fetchone()
-            if row:
-                return {
-                    "section_code": row[0],
-                    "section_description": row[1],
-                    "division_code": row[2],
-                    "division_description": row[3],
-                    "main_class_code": row[4],
-                    "main_class_description": row[5],
-                }
-        return None
+        section = self._by_code.get(code)
+        # Hand out a copy so callers can't modify the shared table
+        return dict(section) if section else None
 
     def search(self, query: str, limit: int = 10) -> list[dict[str, str]]:
         """Search across all DDC levels"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT code, title, level, display 
-                FROM searchable_ddc 
-                WHERE search_text LIKE ?
-                ORDER BY code
-                LIMIT ?
-            """,
-                (f"%{query}%", limit),
-            )
-            return [
-                {"code": row[0], "title": row[1], "level": row[2], "display": row[3]}
-                for row in cursor.fetchall()
-            ]
+        # Hand out copies so callers can't modify the cached results
+        return [dict(result) for result in self._search_cached(query, limit)]
+
+    def _search_impl(self, query: str, limit: int) -> tuple[dict[str, str], ...]:
+        """Run a search against the database"""
+        cursor = self._get_conn().execute(self._search_sql, (f"%{query}%", limit))
+        return tuple(dict(row) for row in cursor.fetchall())
+
+    def clear_cache(self) -> None:
+        """Forget all cached search results"""
+        self._search_cached.cache_clear()
 
     def get_random_section(
         self, exclude_unassigned: bool = True
     ) -> dict[str, str | int] | None:
         """Get a random section"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            if exclude_unassigned:
-                cursor.execute("""
-                    SELECT * FROM full_classification 
-                    WHERE section_description NOT LIKE '%[Unassigned]%'
-                    ORDER BY RANDOM() 
-                    LIMIT 1
-                """)
-            else:
-                cursor.execute("""
-                    SELECT * FROM full_classification 
-                    ORDER BY RANDOM() 
-                    LIMIT 1
-                """)
-            row = cursor.fetchone()
-            if row:
-                return {
-                    "section_code": row[0],
-                    "section_description": row[1],
-                    "division_code": row[2],
-                    "division_description": row[3],
-                    "main_class_code": row[4],
-                    "main_class_description": row[5],
-                }
-        return None
+        if exclude_unassigned:
+            sql, count = self._RANDOM_ASSIGNED_SECTION_SQL, self._assigned_section_count
+        else:
+            sql, count = self._RANDOM_SECTION_SQL, self._section_count
+        if not count:
+            return None
+        row = self._get_conn().execute(sql, (random.randrange(count),)).fetchone()
+        return self.get_section(row["section_code"]) if row else None
 
     def get_sections_by_division(
         self, division_code: str
     ) -> list[dict[str, str | int]]:
         """Get all sections in a division"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT code, description 
-                FROM sections 
-                WHERE division = ?
-                ORDER BY code
-            """,
-                (division_code,),
-            )
-            return [
-                {"code": row[0], "description": row[1]} for row in cursor.fetchall()
-            ]
+        cursor = self._get_conn().execute(
+            self._SECTIONS_BY_DIVISION_SQL, (division_code,)
+        )
+        return [dict(row) for row in cursor.fetchall()]
 
     def get_divisions_by_main_class(
         self, main_class_code: str
     ) -> list[dict[str, str | int]]:
         """Get all divisions in a main class"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT code, description 
-                FROM divisions 
-                WHERE main_class = ?
-                ORDER BY code
-            """,
-                (main_class_code,),
-            )
-            return [
-                {"code": row[0], "description": row[1]} for row in cursor.fetchall()
-            ]
+        cursor = self._get_conn().execute(
+            self._DIVISIONS_BY_MAIN_CLASS_SQL, (main_class_code,)
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def build_search_index(db_path: str) -> None:
+    """Create (or rebuild) the FTS5 search index for an existing database"""
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript("""
+            DROP TABLE IF EXISTS searchable_ddc_fts;
+            CREATE VIRTUAL TABLE searchable_ddc_fts USING fts5(
+                code UNINDEXED,
+                title UNINDEXED,
+                level UNINDEXED,
+                display UNINDEXED,
+                search_text,
+                tokenize = 'trigram'
+            );
+            INSERT INTO searchable_ddc_fts (code, title, level, display, search_text)
+            SELECT code, title, level, display, search_text FROM searchable_ddc;
+        """)
+
+
+if __name__ == "__main__":
+    import sys
+
+    build_search_index(sys.argv[1] if len(sys.argv) > 1 else "ddc_database.db")
 
 
 # Example usage: